@@ -4,11 +4,92 @@ Demonstrates complex SQL queries, window functions, and data aggregation techniq
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func, extract, case
+from sqlalchemy import text, func, extract, case, inspect
+from sqlalchemy.dialects import postgresql
 from models.database import Transaction, Category, Budget, User
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+import threading
+import queue
+import os
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import adbc_driver_postgresql.dbapi as adbc_postgresql
+
+# Concurrent ADBC connections per database for Arrow-backed analytics queries
+ADBC_POOL_SIZE = int(os.getenv("ADBC_POOL_SIZE", 4))
+
+# Renders text() queries with $n placeholders for the ADBC driver
+ARROW_QUERY_DIALECT = postgresql.dialect(paramstyle='numeric_dollar')
+
+@lru_cache(maxsize=64)
+def _compile_arrow_query(sql: str) -> Tuple[str, Tuple[str, ...]]:
+    """Render a text() query once into $n-placeholder SQL plus its parameter order"""
+    compiled = text(sql).compile(dialect=ARROW_QUERY_DIALECT)
+    return compiled.string, tuple(compiled.positiontup)
+
+class _PreparedArrowConnection:
+    """
+    ADBC connection keeping one cursor per SQL statement
+    Re-executing a statement on its cursor reuses the server-side prepared plan
+    """
+    
+    def __init__(self, uri: str):
+        self.connection = adbc_postgresql.connect(uri, autocommit=True)
+        self.cursors = {}
+    
+    def fetch(self, sql: str, args: List) -> pa.Table:
+        cursor = self.cursors.get(sql)
+        if cursor is None:
+            cursor = self.cursors[sql] = self.connection.cursor()
+        
+        cursor.execute(sql, args)
+        return cursor.fetch_arrow_table()
+    
+    def close(self) -> None:
+        for cursor in self.cursors.values():
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.cursors = {}
+
+class _PreparedArrowQueries:
+    """
+    Bounded pool of prepared-statement ADBC connections for one database
+    Up to `size` queries run concurrently, each on its own connection
+    """
+    
+    def __init__(self, uri: str, size: int):
+        self.uri = uri
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+    
+    def fetch(self, sql: str, args: List) -> pa.Table:
+        with self.slots:
+            try:
+                connection = self.idle.get_nowait()
+            except queue.Empty:
+                connection = _PreparedArrowConnection(self.uri)
+            
+            try:
+                table = connection.fetch(sql, args)
+            except Exception:
+                # Drop the connection so later queries start from a clean session
+                connection.close()
+                raise
+            
+            self.idle.put(connection)
+            return table
+
+_prepared_queries: Dict[str, _PreparedArrowQueries] = {}
 
 class FinancialAnalytics:
     """Advanced financial analytics using SQL and pandas for data science insights"""
@@ -16,6 +97,37 @@ class FinancialAnalytics:
     def __init__(self, db: Session):
         self.db = db
     
+    def _fetch_arrow(self, query, params: Dict) -> pa.Table:
+        """
+        Execute an analytics query and return the result set as an Arrow table
+        On PostgreSQL, rows are streamed straight into Arrow via ADBC instead of Python tuples
+        """
+        bind = self.db.get_bind()
+        if bind.dialect.name != 'postgresql':
+            result = self.db.execute(query, params)
+            df = pd.DataFrame(result.fetchall(), columns=result.keys())
+            return pa.Table.from_pandas(df, preserve_index=False)
+        
+        sql, param_names = _compile_arrow_query(query.text)
+        args = [params[name] for name in param_names]
+        uri = bind.url.set(drivername='postgresql').render_as_string(hide_password=False)
+        
+        runner = _prepared_queries.get(uri)
+        if runner is None:
+            runner = _prepared_queries.setdefault(uri, _PreparedArrowQueries(uri, ADBC_POOL_SIZE))
+        table = runner.fetch(sql, args)
+        
+        # ADBC hands NUMERIC back as text; cast to float64 for the computations downstream
+        for i, field in enumerate(table.schema):
+            if (field.metadata or {}).get(b'ADBC:postgresql:typname') == b'numeric':
+                table = table.set_column(i, field.name, table.column(i).cast(pa.string()).cast(pa.float64()))
+        
+        return table
+    
+    def _fetch_dataframe(self, query, params: Dict) -> pd.DataFrame:
+        """Execute an analytics query and return the result set as a DataFrame"""
+        return self._fetch_arrow(query, params).to_pandas()
+    
     def get_spending_trends(self, user_id: int, months: int = 12) -> pd.DataFrame:
         """
         Complex SQL query with window functions to analyze spending trends
@@ -33,7 +145,7 @@ class FinancialAnalytics:
                 FROM transactions t
                 JOIN categories c ON t.category_id = c.id
                 WHERE t.user_id = :user_id 
-                    AND transaction_date >= CURRENT_DATE - INTERVAL ':months months'
+                    AND transaction_date >= CURRENT_DATE - make_interval(months => CAST(:months AS INTEGER))
                     AND c.category_type = 'expense'
                 GROUP BY DATE_TRUNC('month', transaction_date), c.name, c.category_type
             ),
@@ -63,8 +175,7 @@ class FinancialAnalytics:
             ORDER BY month DESC, total_amount DESC
         """)
         
-        result = self.db.execute(query, {"user_id": user_id, "months": months})
-        return pd.DataFrame(result.fetchall(), columns=result.keys())
+        return self._fetch_dataframe(query, {"user_id": user_id, "months": months})
     
     def budget_variance_analysis(self, user_id: int) -> pd.DataFrame:
         """
@@ -111,8 +222,7 @@ class FinancialAnalytics:
             ORDER BY variance_percentage DESC
         """)
         
-        result = self.db.execute(query, {"user_id": user_id})
-        return pd.DataFrame(result.fetchall(), columns=result.keys())
+        return self._fetch_dataframe(query, {"user_id": user_id})
     
     def savings_investment_analysis(self, user_id: int) -> Dict:
         """
@@ -159,16 +269,16 @@ class FinancialAnalytics:
             ORDER BY month DESC
         """)
         
-        result = self.db.execute(query, {"user_id": user_id})
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+        table = self._fetch_arrow(query, {"user_id": user_id})
+        savings_rate = table.column('savings_rate')
         
-        # Calculate summary statistics using pandas
+        # Calculate summary statistics with Arrow compute kernels, skipping the pandas round-trip
         summary_stats = {
-            "avg_monthly_savings": df['total_savings'].mean(),
-            "avg_savings_rate": df['savings_rate'].mean(),
-            "total_savings_ytd": df['total_savings'].sum(),
-            "savings_trend": "increasing" if df['savings_rate'].iloc[0] > df['savings_rate'].iloc[-1] else "decreasing",
-            "monthly_data": df.to_dict('records')
+            "avg_monthly_savings": pc.mean(table.column('total_savings')).as_py(),
+            "avg_savings_rate": pc.mean(savings_rate).as_py(),
+            "total_savings_ytd": pc.sum(table.column('total_savings')).as_py(),
+            "savings_trend": "increasing" if savings_rate[0].as_py() > savings_rate[-1].as_py() else "decreasing",
+            "monthly_data": table.to_pylist()
         }
         
         return summary_stats
@@ -179,70 +289,71 @@ class FinancialAnalytics:
         Demonstrates data preparation for ML models
         """
         query = text("""
-            WITH expense_features AS (
-                SELECT 
-                    t.id,
-                    t.amount,
-                    c.name as category,
-                    t.merchant,
-                    t.description,
-                    EXTRACT(HOUR FROM t.transaction_date) as hour_of_day,
-                    EXTRACT(DOW FROM t.transaction_date) as day_of_week,
-                    EXTRACT(MONTH FROM t.transaction_date) as month,
-                    t.is_recurring,
-                    -- Statistical features for ML
-                    AVG(t.amount) OVER (PARTITION BY c.name) as category_avg_amount,
-                    STDDEV(t.amount) OVER (PARTITION BY c.name) as category_std_amount,
-                    COUNT(*) OVER (PARTITION BY c.name) as category_frequency,
-                    PERCENT_RANK() OVER (PARTITION BY c.name ORDER BY t.amount) as amount_percentile_in_category,
-                    -- Time-based features
-                    AVG(t.amount) OVER (PARTITION BY t.user_id ORDER BY t.transaction_date 
-                                       ROWS BETWEEN 6 PRECEDING AND CURRENT ROW) as rolling_avg_7_transactions
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                WHERE t.user_id = :user_id
-                    AND c.category_type = 'expense'
-                    AND t.transaction_date >= CURRENT_DATE - INTERVAL '6 months'
-            )
-            SELECT *,
-                CASE 
-                    WHEN amount > category_avg_amount + (2 * category_std_amount) THEN 'outlier_high'
-                    WHEN amount < category_avg_amount - (2 * category_std_amount) THEN 'outlier_low'
-                    ELSE 'normal'
-                END as anomaly_flag
-            FROM expense_features
-            ORDER BY transaction_date DESC
+            SELECT 
+                t.id,
+                t.amount,
+                c.name as category,
+                t.merchant,
+                t.description,
+                EXTRACT(HOUR FROM t.transaction_date) as hour_of_day,
+                EXTRACT(DOW FROM t.transaction_date) as day_of_week,
+                EXTRACT(MONTH FROM t.transaction_date) as month,
+                t.is_recurring,
+                -- Statistical features for ML
+                AVG(t.amount) OVER (PARTITION BY c.name) as category_avg_amount,
+                STDDEV(t.amount) OVER (PARTITION BY c.name) as category_std_amount,
+                COUNT(*) OVER (PARTITION BY c.name) as category_frequency,
+                PERCENT_RANK() OVER (PARTITION BY c.name ORDER BY t.amount) as amount_percentile_in_category,
+                -- Time-based features
+                AVG(t.amount) OVER (PARTITION BY t.user_id ORDER BY t.transaction_date 
+                                   ROWS BETWEEN 6 PRECEDING AND CURRENT ROW) as rolling_avg_7_transactions
+            FROM transactions t
+            JOIN categories c ON t.category_id = c.id
+            WHERE t.user_id = :user_id
+                AND c.category_type = 'expense'
+                AND t.transaction_date >= CURRENT_DATE - INTERVAL '6 months'
+            ORDER BY t.transaction_date DESC
         """)
         
-        result = self.db.execute(query, {"user_id": user_id})
-        return pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = self._fetch_dataframe(query, {"user_id": user_id})
+        
+        # Flag amounts more than two standard deviations from the category mean
+        deviation = (df['amount'].astype('float64') - df['category_avg_amount'].astype('float64')).to_numpy()
+        threshold = 2 * df['category_std_amount'].astype('float64').to_numpy()
+        df['anomaly_flag'] = np.select(
+            [deviation > threshold, deviation < -threshold],
+            ['outlier_high', 'outlier_low'],
+            default='normal'
+        )
+        
+        return df
     
     def financial_health_score(self, user_id: int) -> Dict:
         """
         Comprehensive financial health analysis using advanced SQL
-        Demonstrates complex business logic implementation in SQL
+        Reads the trigger-maintained daily rollup (migration 002) instead of raw transactions
         """
         query = text("""
             WITH financial_metrics AS (
                 SELECT 
                     -- Income metrics
-                    SUM(CASE WHEN c.category_type = 'income' THEN t.amount ELSE 0 END) as total_income,
+                    SUM(CASE WHEN c.category_type = 'income' THEN r.total_amount ELSE 0 END) as total_income,
                     -- Expense metrics
-                    SUM(CASE WHEN c.category_type = 'expense' THEN t.amount ELSE 0 END) as total_expenses,
+                    SUM(CASE WHEN c.category_type = 'expense' THEN r.total_amount ELSE 0 END) as total_expenses,
                     -- Savings metrics
-                    SUM(CASE WHEN c.category_type = 'savings' THEN t.amount ELSE 0 END) as total_savings,
+                    SUM(CASE WHEN c.category_type = 'savings' THEN r.total_amount ELSE 0 END) as total_savings,
                     -- Essential vs non-essential expenses
                     SUM(CASE WHEN c.name IN ('Housing', 'Utilities', 'Groceries', 'Transportation') 
-                             AND c.category_type = 'expense' THEN t.amount ELSE 0 END) as essential_expenses,
+                             AND c.category_type = 'expense' THEN r.total_amount ELSE 0 END) as essential_expenses,
                     SUM(CASE WHEN c.name NOT IN ('Housing', 'Utilities', 'Groceries', 'Transportation') 
-                             AND c.category_type = 'expense' THEN t.amount ELSE 0 END) as discretionary_expenses,
+                             AND c.category_type = 'expense' THEN r.total_amount ELSE 0 END) as discretionary_expenses,
                     -- Transaction patterns
-                    COUNT(DISTINCT DATE_TRUNC('day', t.transaction_date)) as active_days,
-                    COUNT(*) as total_transactions
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                WHERE t.user_id = :user_id
-                    AND t.transaction_date >= CURRENT_DATE - INTERVAL '3 months'
+                    COUNT(DISTINCT r.day) as active_days,
+                    COALESCE(SUM(r.transaction_count), 0) as total_transactions
+                FROM transaction_daily_rollup r
+                JOIN categories c ON r.category_id = c.id
+                WHERE r.user_id = :user_id
+                    AND r.day >= (NOW() AT TIME ZONE 'UTC')::date - INTERVAL '3 months'
             ),
             health_calculations AS (
                 SELECT *,
@@ -269,10 +380,16 @@ class FinancialAnalytics:
             FROM health_calculations
         """)
         
-        result = self.db.execute(query, {"user_id": user_id})
-        row = result.fetchone()
+        try:
+            df = self._fetch_dataframe(query, {"user_id": user_id})
+        except Exception as e:
+            if not inspect(self.db.get_bind()).has_table('transaction_daily_rollup'):
+                raise RuntimeError(
+                    "transaction_daily_rollup is missing; apply migrations/002_transaction_daily_rollup.sql"
+                ) from e
+            raise
         
-        if row:
-            return dict(row._mapping)
+        if not df.empty:
+            return df.to_dict('records')[0]
         else:
             return {"error": "No financial data found for user"}
@@ -5,18 +5,85 @@ Demonstrates data engineering best practices with Python and pandas.
 
 import pandas as pd
 import numpy as np
+from sqlalchemy import insert, text
 from sqlalchemy.orm import Session
-from models.database import Transaction, Category, User, get_db
-from typing import Dict, List, Optional, Tuple
+from models.database import Transaction, Category, User, get_db, cached_category_ids, cache_category_ids, warm_category_cache
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 from dataclasses import dataclass
-import re
+import io
+import csv
+import os
+import hashlib
+import tempfile
+import codecs
+import uuid
+import multiprocessing
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import psycopg2
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Private (0700) directory for Parquet snapshots of transformed uploads
+ETL_CACHE_DIR = os.getenv("ETL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "finsight", "etl"))
+# Least recently used snapshots are evicted once the directory grows past this size
+ETL_CACHE_MAX_BYTES = int(os.getenv("ETL_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+# Part of every cache key; bump whenever transform_transaction_data changes its output
+ETL_CACHE_VERSION = 1
+
+# CSVs at or above this size are streamed through the pipeline in Arrow record batches
+ETL_STREAM_THRESHOLD_BYTES = int(os.getenv("ETL_STREAM_THRESHOLD_BYTES", 256 * 1024 * 1024))
+ETL_STREAM_BLOCK_SIZE = 64 * 1024 * 1024
+
+# PostgreSQL loads of at least this many rows are sharded across worker processes
+ETL_PARALLEL_THRESHOLD_ROWS = int(os.getenv("ETL_PARALLEL_THRESHOLD_ROWS", 200_000))
+ETL_PARALLEL_WORKERS = int(os.getenv("ETL_PARALLEL_WORKERS", os.cpu_count() or 1))
+
+
+def _copy_columns(cursor, columns: Dict[str, np.ndarray], table: str = 'transactions') -> None:
+    """Stream column arrays into a table with COPY FROM STDIN"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(zip(*(values.tolist() for values in columns.values())))
+    buffer.seek(0)
+    
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH CSV",
+        buffer
+    )
+
+
+def _copy_shard(database_url: str, table: str, shard: Dict[str, np.ndarray]) -> int:
+    """
+    Load one shard of column arrays into a staging table on a dedicated psycopg2 connection
+    Runs in a worker process; staging tables carry no triggers, so shards never contend
+    """
+    connection = psycopg2.connect(database_url)
+    try:
+        with connection, connection.cursor() as cursor:
+            cursor.execute("SET LOCAL synchronous_commit = off")
+            _copy_columns(cursor, shard, table)
+    finally:
+        connection.close()
+    
+    return len(shard['user_id'])
+
+
+def _execute_autocommit(database_url: str, statement: str) -> None:
+    """Run one statement on its own autocommit psycopg2 connection, outside the SQLAlchemy pool"""
+    connection = psycopg2.connect(database_url)
+    try:
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(statement)
+    finally:
+        connection.close()
+
+
 @dataclass
 class TransactionData:
     """Data class for structured transaction processing"""
@@ -33,9 +100,15 @@ class FinancialDataETL:
     Demonstrates data engineering patterns and data quality management
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache_dir: Optional[str] = ETL_CACHE_DIR):
         self.db = db
+        self.cache_dir = cache_dir
         self.category_mapping = self._load_category_mapping()
+        # Parallel-load staging tables, dropped once the session's transaction has ended
+        self._stage_tables: List[str] = []
+        # Inline (?i) keeps matching caseless on Arrow's regex kernel without lowercasing first
+        self._merchant_prefix_pattern = r'(?i)^(purchase|payment|transfer|deposit)\s+'
+        self._merchant_suffix_pattern = r'(?i)\s+(inc|llc|corp|ltd)$'
         
     def _load_category_mapping(self) -> Dict[str, str]:
         """Load category mapping for automatic categorization"""
@@ -52,6 +125,13 @@ class FinancialDataETL:
             r'.*savings.*|.*investment.*|.*401k.*': 'Savings'
         }
     
+    def _category_keywords(self) -> List[Tuple[str, str]]:
+        """Category patterns reduced to bare keyword alternations, in priority order"""
+        return [
+            ('|'.join(part.strip('.*') for part in pattern.split('|')), category)
+            for pattern, category in self.category_mapping.items()
+        ]
+    
     def extract_csv_data(self, file_path: str) -> pd.DataFrame:
         """
         Extract financial data from CSV files with error handling
@@ -64,7 +144,7 @@ class FinancialDataETL:
             
             for encoding in encodings:
                 try:
-                    df = pd.read_csv(file_path, encoding=encoding)
+                    df = pd.read_csv(file_path, encoding=encoding, dtype_backend='pyarrow')
                     logger.info(f"Successfully loaded CSV with {encoding} encoding")
                     break
                 except UnicodeDecodeError:
@@ -80,6 +160,42 @@ class FinancialDataETL:
             logger.error(f"Error extracting CSV data: {str(e)}")
             raise
     
+    def stream_csv_batches(self, file_path: str) -> Iterator[pd.DataFrame]:
+        """
+        Stream a CSV as Arrow-backed DataFrames, one record batch at a time
+        Every column is read as text so type inference cannot drift between batches
+        """
+        encodings = ['utf-8', 'latin-1', 'cp1252']
+        sample_size = 1024 * 1024
+        
+        with open(file_path, 'rb') as f:
+            sample = f.read(sample_size)
+        
+        for encoding in encodings:
+            try:
+                text_sample = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            raise ValueError("Could not read CSV file with any supported encoding")
+        
+        header = next(csv.reader(io.StringIO(text_sample)), None)
+        if header is None:
+            raise ValueError("CSV file is empty")
+        reader = pa_csv.open_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(block_size=ETL_STREAM_BLOCK_SIZE, encoding=encoding),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in header},
+                strings_can_be_null=True
+            )
+        )
+        logger.info(f"Streaming {file_path} with {encoding} encoding")
+        
+        for batch in reader:
+            yield batch.to_pandas(types_mapper=pd.ArrowDtype)
+    
     def transform_transaction_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Advanced data transformation with data quality checks
@@ -90,22 +206,10 @@ class FinancialDataETL:
         # Standardize column names
         df.columns = df.columns.str.lower().str.replace(' ', '_')
         
-        # Data quality checks
-        initial_count = len(df)
-        
-        # Remove duplicates
-        df = df.drop_duplicates()
-        logger.info(f"Removed {initial_count - len(df)} duplicate records")
+        # Arrow-backed strings keep descriptions in contiguous buffers for the str kernels below
+        df['description'] = df['description'].astype('string[pyarrow]')
         
-        # Handle missing values
-        df = df.dropna(subset=['amount', 'description'])
-        logger.info(f"Removed records with missing critical fields")
-        
-        # Data type conversions with error handling
-        df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-        df = df.dropna(subset=['amount'])
-        
-        # Date parsing with multiple format support
+        # Date column detection
         date_columns = ['date', 'transaction_date', 'posted_date']
         date_col = None
         
@@ -114,12 +218,29 @@ class FinancialDataETL:
                 date_col = col
                 break
         
-        if date_col:
-            df['transaction_date'] = pd.to_datetime(df[date_col], errors='coerce', infer_datetime_format=True)
-            df = df.dropna(subset=['transaction_date'])
-        else:
+        if not date_col:
             raise ValueError("No valid date column found")
         
+        # Data type conversions with error handling
+        # Cast to float64 so unparseable amounts surface as NaN regardless of CSV backend
+        amount = pd.to_numeric(df['amount'], errors='coerce').astype('float64')
+        # Date parsing with multiple format support
+        transaction_date = pd.to_datetime(df[date_col], errors='coerce', infer_datetime_format=True)
+        
+        # Data quality checks: duplicates and missing/invalid critical fields, filtered in one pass
+        duplicated = df.duplicated().to_numpy()
+        valid = (df['description'].notna().to_numpy()
+                 & amount.notna().to_numpy()
+                 & transaction_date.notna().to_numpy())
+        keep = ~duplicated & valid
+        
+        logger.info(f"Removed {int(duplicated.sum())} duplicate records")
+        logger.info(f"Removed {int((~duplicated & ~valid).sum())} records with missing or invalid critical fields")
+        
+        df = df.loc[keep].copy()
+        df['amount'] = amount[keep]
+        df['transaction_date'] = transaction_date[keep]
+        
         # Feature engineering
         df['month'] = df['transaction_date'].dt.month
         df['day_of_week'] = df['transaction_date'].dt.dayofweek
@@ -127,13 +248,13 @@ class FinancialDataETL:
         df['amount_abs'] = df['amount'].abs()
         
         # Automatic categorization using regex patterns
-        df['predicted_category'] = df['description'].apply(self._predict_category)
+        df['predicted_category'] = self._predict_categories(df['description'])
         
         # Merchant extraction
-        df['merchant'] = df['description'].apply(self._extract_merchant)
+        df['merchant'] = self._extract_merchants(df['description'])
         
         # Payment method detection
-        df['payment_method'] = df.apply(self._detect_payment_method, axis=1)
+        df['payment_method'] = self._detect_payment_methods(df['description'])
         
         # Anomaly detection using statistical methods
         df['is_anomaly'] = self._detect_anomalies(df)
@@ -141,64 +262,61 @@ class FinancialDataETL:
         logger.info(f"Transformation complete. Final dataset: {len(df)} records")
         return df
     
-    def _predict_category(self, description: str) -> str:
-        """Predict transaction category using pattern matching"""
-        description_lower = description.lower()
-        
-        for pattern, category in self.category_mapping.items():
-            if re.search(pattern, description_lower):
-                return category
+    def _predict_categories(self, descriptions: pd.Series) -> pd.Series:
+        """
+        Vectorized category prediction over a whole description column
+        On Arrow-backed strings each keyword test runs through Arrow's RE2 (DFA) kernel
+        """
+        keywords = self._category_keywords()
+        conditions = [
+            descriptions.str.contains(pattern, case=False, regex=True).to_numpy(dtype=bool, na_value=False)
+            for pattern, _ in keywords
+        ]
         
-        return 'Other'
+        categories = np.select(conditions, [category for _, category in keywords], default='Other')
+        return pd.Series(categories, index=descriptions.index)
     
-    def _extract_merchant(self, description: str) -> str:
-        """Extract merchant name from transaction description"""
+    def _extract_merchants(self, descriptions: pd.Series) -> pd.Series:
+        """Extract merchant names from transaction descriptions"""
         # Remove common prefixes and suffixes
-        cleaned = re.sub(r'^(purchase|payment|transfer|deposit)\s+', '', description.lower())
-        cleaned = re.sub(r'\s+(inc|llc|corp|ltd)$', '', cleaned)
+        cleaned = (descriptions
+                   .str.replace(self._merchant_prefix_pattern, '', regex=True)
+                   .str.replace(self._merchant_suffix_pattern, '', regex=True))
         
         # Extract first meaningful part
-        parts = cleaned.split()
-        if parts:
-            return parts[0].title()
-        
-        return 'Unknown'
+        return cleaned.str.split(n=1).str[0].str.title().fillna('Unknown')
     
-    def _detect_payment_method(self, row: pd.Series) -> str:
-        """Detect payment method from transaction data"""
-        description = row['description'].lower()
-        
-        if 'debit' in description or 'atm' in description:
-            return 'Debit Card'
-        elif 'credit' in description:
-            return 'Credit Card'
-        elif 'check' in description:
-            return 'Check'
-        elif 'transfer' in description:
-            return 'Bank Transfer'
-        elif 'cash' in description:
-            return 'Cash'
-        else:
-            return 'Unknown'
+    def _detect_payment_methods(self, descriptions: pd.Series) -> np.ndarray:
+        """Detect payment method from transaction descriptions using vectorized masks"""
+        conditions = [
+            descriptions.str.contains(keywords, case=False, regex=True).to_numpy(dtype=bool, na_value=False)
+            for keywords in ('debit|atm', 'credit', 'check', 'transfer', 'cash')
+        ]
+        choices = ['Debit Card', 'Credit Card', 'Check', 'Bank Transfer', 'Cash']
+        
+        return np.select(conditions, choices, default='Unknown')
     
     def _detect_anomalies(self, df: pd.DataFrame) -> pd.Series:
         """
         Statistical anomaly detection using IQR method
         Demonstrates data science techniques for outlier detection
         """
-        Q1 = df['amount_abs'].quantile(0.25)
-        Q3 = df['amount_abs'].quantile(0.75)
+        amounts = df['amount_abs'].to_numpy(dtype=np.float64)
+        if amounts.size == 0:
+            return pd.Series(False, index=df.index)
+        
+        Q1, Q3 = np.quantile(amounts, [0.25, 0.75])
         IQR = Q3 - Q1
         
         lower_bound = Q1 - 1.5 * IQR
         upper_bound = Q3 + 1.5 * IQR
         
-        return (df['amount_abs'] < lower_bound) | (df['amount_abs'] > upper_bound)
+        return pd.Series((amounts < lower_bound) | (amounts > upper_bound), index=df.index)
     
-    def load_to_database(self, df: pd.DataFrame, user_id: int) -> Dict[str, int]:
+    def load_to_database(self, df: pd.DataFrame, user_id: int, commit: bool = True) -> Dict[str, int]:
         """
         Load transformed data into database with batch processing
-        Demonstrates efficient database operations
+        With commit=False the rows stay in the session's open transaction for the caller to commit
         """
         logger.info("Starting database load process")
         
@@ -209,62 +327,104 @@ class FinancialDataETL:
             'categories_created': 0
         }
         
+        use_copy = self.db.get_bind().dialect.name == 'postgresql'
+        
         try:
-            # Batch process categories
-            unique_categories = df['predicted_category'].unique()
-            category_map = {}
+            if use_copy:
+                # Defer the WAL flush for this transaction only. A crash right after the
+                # final commit can lose the load, but never leaves it partially applied
+                self.db.execute(text("SET LOCAL synchronous_commit = off"))
+            
+            # Batch process categories: process cache first, then one lookup and one insert for the rest
+            unique_categories = [str(name) for name in df['predicted_category'].unique()]
+            category_map = cached_category_ids(unique_categories)
+            uncached = [name for name in unique_categories if name not in category_map]
+            if uncached:
+                category_map.update(
+                    self.db.query(Category.name, Category.id)
+                    .filter(Category.name.in_(uncached))
+                    .all()
+                )
             
+            new_categories = []
             for cat_name in unique_categories:
-                category = self.db.query(Category).filter(Category.name == cat_name).first()
-                if not category:
-                    # Determine category type
-                    cat_type = 'expense'
-                    if cat_name in ['Income', 'Salary', 'Bonus']:
-                        cat_type = 'income'
-                    elif cat_name in ['Savings', 'Investment', '401k']:
-                        cat_type = 'savings'
-                    
-                    category = Category(
-                        name=cat_name,
-                        category_type=cat_type,
-                        description=f"Auto-generated category for {cat_name}"
-                    )
-                    self.db.add(category)
-                    self.db.flush()
-                    stats['categories_created'] += 1
+                if cat_name in category_map:
+                    continue
+                
+                # Determine category type
+                cat_type = 'expense'
+                if cat_name in ['Income', 'Salary', 'Bonus']:
+                    cat_type = 'income'
+                elif cat_name in ['Savings', 'Investment', '401k']:
+                    cat_type = 'savings'
+                
+                new_categories.append(Category(
+                    name=cat_name,
+                    category_type=cat_type,
+                    description=f"Auto-generated category for {cat_name}"
+                ))
+            
+            if new_categories:
+                # Flushed as a single multi-row INSERT ... RETURNING id
+                self.db.add_all(new_categories)
+                self.db.flush()
+                category_map.update((category.name, category.id) for category in new_categories)
+                stats['categories_created'] += len(new_categories)
+            
+            # Resolve category ids for the whole column at once
+            category_ids = df['predicted_category'].map(category_map)
+            unmapped = category_ids.isna()
+            if unmapped.any():
+                logger.error(f"Skipping {int(unmapped.sum())} rows with unknown categories")
+                stats['failed_inserts'] += int(unmapped.sum())
+            
+            # Struct-of-arrays load buffers; batches are array slices, never per-row Series or ORM objects
+            keep = ~unmapped.to_numpy()
+            row_count = int(keep.sum())
+            load_columns = {
+                'user_id': np.full(row_count, user_id, dtype=np.int64),
+                'category_id': category_ids.to_numpy()[keep].astype(np.int64),
+                'amount': df['amount'].to_numpy(dtype=np.float64)[keep],
+                'description': df['description'].to_numpy(dtype=object)[keep],
+                'transaction_date': df['transaction_date'].to_numpy(dtype=object)[keep],
+                'merchant': df['merchant'].to_numpy(dtype=object)[keep],
+                'payment_method': df['payment_method'].to_numpy(dtype=object)[keep],
+                'is_recurring': np.zeros(row_count, dtype=bool)  # Could be enhanced with pattern detection
+            }
+            
+            if use_copy and row_count >= ETL_PARALLEL_THRESHOLD_ROWS and ETL_PARALLEL_WORKERS > 1:
+                # Shards are staged in parallel, then moved into transactions within this session's transaction
+                self._copy_parallel(load_columns, row_count)
+                stats['successful_inserts'] += row_count
+                
+                if commit:
+                    self.db.commit()
+                    cache_category_ids(category_map)
                 
-                category_map[cat_name] = category.id
+                logger.info(f"Database load complete: {stats}")
+                return stats
             
-            # Batch insert transactions
+            # Batch insert transactions, using COPY when the backend supports it
             batch_size = 1000
-            for i in range(0, len(df), batch_size):
-                batch = df.iloc[i:i+batch_size]
-                transactions = []
+            for i in range(0, row_count, batch_size):
+                batch = {name: values[i:i+batch_size] for name, values in load_columns.items()}
+                batch_rows = len(batch['user_id'])
                 
-                for _, row in batch.iterrows():
-                    try:
-                        transaction = Transaction(
-                            user_id=user_id,
-                            category_id=category_map[row['predicted_category']],
-                            amount=row['amount'],
-                            description=row['description'],
-                            transaction_date=row['transaction_date'],
-                            merchant=row['merchant'],
-                            payment_method=row['payment_method'],
-                            is_recurring=False  # Could be enhanced with pattern detection
-                        )
-                        transactions.append(transaction)
-                        stats['successful_inserts'] += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing row: {str(e)}")
-                        stats['failed_inserts'] += 1
+                if use_copy:
+                    self._copy_batch(batch)
+                else:
+                    # Core insert skips ORM object construction and identity-map bookkeeping
+                    names = list(batch)
+                    records = [dict(zip(names, row)) for row in zip(*(values.tolist() for values in batch.values()))]
+                    self.db.execute(insert(Transaction), records)
+                stats['successful_inserts'] += batch_rows
                 
-                # Bulk insert batch
-                self.db.bulk_save_objects(transactions)
+                logger.info(f"Processed batch {i//batch_size + 1}/{(row_count//batch_size) + 1}")
+            
+            # Single commit for the whole load; only committed category ids are cached
+            if commit:
                 self.db.commit()
-                
-                logger.info(f"Processed batch {i//batch_size + 1}/{(len(df)//batch_size) + 1}")
+                cache_category_ids(category_map)
             
             logger.info(f"Database load complete: {stats}")
             return stats
@@ -273,6 +433,149 @@ class FinancialDataETL:
             self.db.rollback()
             logger.error(f"Database load failed: {str(e)}")
             raise
+        finally:
+            if commit:
+                self._drop_stage_tables()
+    
+    def _copy_batch(self, batch: Dict[str, np.ndarray]) -> None:
+        """
+        Stream a batch of column arrays into PostgreSQL with COPY FROM STDIN
+        Avoids per-row parameter binding of INSERT statements
+        """
+        # Raw DBAPI connection participating in the session's transaction
+        raw_connection = self.db.connection().connection
+        with raw_connection.cursor() as cursor:
+            _copy_columns(cursor, batch)
+    
+    def _database_url(self) -> str:
+        """libpq URL for the session's database, for connections outside the SQLAlchemy pool"""
+        return self.db.get_bind().url.set(drivername='postgresql').render_as_string(hide_password=False)
+    
+    def _copy_parallel(self, load_columns: Dict[str, np.ndarray], row_count: int) -> None:
+        """
+        COPY row-range shards concurrently into an unlogged staging table, one process per shard,
+        then move them into transactions with a single INSERT ... SELECT in the session's transaction
+        Any failed shard aborts the whole load, so nothing is committed and a retry cannot duplicate rows
+        """
+        database_url = self._database_url()
+        columns = ', '.join(load_columns)
+        stage_table = f"etl_stage_{uuid.uuid4().hex}"
+        bounds = np.linspace(0, row_count, ETL_PARALLEL_WORKERS + 1, dtype=np.int64)
+        
+        # Created outside the session's transaction so worker connections can see it
+        _execute_autocommit(
+            database_url,
+            f"CREATE UNLOGGED TABLE {stage_table} AS SELECT {columns} FROM transactions WITH NO DATA"
+        )
+        self._stage_tables.append(stage_table)
+        
+        # Spawned workers start clean instead of forking a process that already runs Arrow and numba threads
+        with ProcessPoolExecutor(max_workers=ETL_PARALLEL_WORKERS,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {
+                executor.submit(_copy_shard, database_url, stage_table,
+                                {name: values[lo:hi] for name, values in load_columns.items()}): (lo, hi)
+                for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+            }
+            for future in as_completed(futures):
+                lo, hi = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise RuntimeError(f"Shard rows {lo}-{hi} failed: {str(e)}") from e
+                logger.info(f"Staged shard rows {lo}-{hi}")
+        
+        # Rollup triggers fire once for the whole load
+        self.db.execute(text(f"INSERT INTO transactions ({columns}) SELECT {columns} FROM {stage_table}"))
+    
+    def _drop_stage_tables(self) -> None:
+        """
+        Drop staging tables after the session's commit or rollback
+        Dropping them earlier would wait on the session's own lock from the INSERT ... SELECT
+        """
+        while self._stage_tables:
+            stage_table = self._stage_tables.pop()
+            try:
+                _execute_autocommit(self._database_url(), f"DROP TABLE IF EXISTS {stage_table}")
+            except Exception as e:
+                logger.warning(f"Could not drop staging table {stage_table}: {str(e)}")
+    
+    def _cache_path(self, csv_file_path: str, user_id: int) -> str:
+        """
+        Parquet cache location for a CSV upload
+        Keyed on file content rather than mtime, since uploads land in fresh temp files
+        """
+        digest = hashlib.blake2b(f"v{ETL_CACHE_VERSION}-{user_id}-".encode(), digest_size=16)
+        with open(csv_file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        
+        return os.path.join(self.cache_dir, f"{digest.hexdigest()}.parquet")
+    
+    def _write_cache(self, df: pd.DataFrame, cache_path: str) -> None:
+        """Atomically write a 0600 Parquet snapshot, then evict the oldest ones over ETL_CACHE_MAX_BYTES"""
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        os.chmod(self.cache_dir, 0o700)
+        
+        # mkstemp creates the file 0600; the rename keeps readers from seeing partial snapshots
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                df.to_parquet(f, engine='pyarrow', compression='zstd')
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.parquet'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= ETL_CACHE_MAX_BYTES:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+    
+    def extract_and_transform(self, csv_file_path: str, user_id: int) -> pd.DataFrame:
+        """
+        Extract and transform a CSV, reusing a cached Parquet snapshot when available
+        The raw record count is carried in DataFrame.attrs['raw_records']
+        """
+        cache_path = self._cache_path(csv_file_path, user_id) if self.cache_dir else None
+        
+        if cache_path:
+            try:
+                # Refresh the mtime so eviction drops the least recently used snapshots first
+                os.utime(cache_path)
+                logger.info(f"Loading transformed data from cache {cache_path}")
+                return pd.read_parquet(cache_path, engine='pyarrow')
+            except FileNotFoundError:
+                pass
+        
+        raw_data = self.extract_csv_data(csv_file_path)
+        raw_records = len(raw_data)
+        transformed_data = self.transform_transaction_data(raw_data)
+        transformed_data.attrs['raw_records'] = raw_records
+        
+        if cache_path:
+            try:
+                self._write_cache(transformed_data, cache_path)
+            except Exception as e:
+                logger.warning(f"Could not cache transformed data: {str(e)}")
+        
+        return transformed_data
     
     def run_full_pipeline(self, csv_file_path: str, user_id: int) -> Dict[str, any]:
         """
@@ -283,24 +586,29 @@ class FinancialDataETL:
         logger.info("Starting full ETL pipeline")
         
         try:
-            # Extract
-            raw_data = self.extract_csv_data(csv_file_path)
-            
-            # Transform
-            transformed_data = self.transform_transaction_data(raw_data)
-            
-            # Load
-            load_stats = self.load_to_database(transformed_data, user_id)
+            if os.path.getsize(csv_file_path) >= ETL_STREAM_THRESHOLD_BYTES:
+                # Large files are transformed and loaded one record batch at a time
+                summary = self._run_streaming_pipeline(csv_file_path, user_id)
+            else:
+                # Extract + Transform
+                transformed_data = self.extract_and_transform(csv_file_path, user_id)
+                
+                # Load
+                load_stats = self.load_to_database(transformed_data, user_id)
+                
+                summary = {
+                    'raw_records': transformed_data.attrs.get('raw_records', len(transformed_data)),
+                    'processed_records': len(transformed_data),
+                    'load_stats': load_stats,
+                    'data_quality_score': self._calculate_data_quality_score(transformed_data)
+                }
             
             pipeline_duration = datetime.now() - pipeline_start
             
             return {
                 'status': 'success',
                 'duration_seconds': pipeline_duration.total_seconds(),
-                'raw_records': len(raw_data),
-                'processed_records': len(transformed_data),
-                'load_stats': load_stats,
-                'data_quality_score': self._calculate_data_quality_score(transformed_data)
+                **summary
             }
             
         except Exception as e:
@@ -311,13 +619,87 @@ class FinancialDataETL:
                 'duration_seconds': (datetime.now() - pipeline_start).total_seconds()
             }
     
+    def _run_streaming_pipeline(self, csv_file_path: str, user_id: int) -> Dict[str, any]:
+        """
+        Transform and load a CSV batch by batch so peak memory tracks the batch, not the file
+        Every batch loads into one transaction, so a failure anywhere leaves nothing committed
+        """
+        raw_records = 0
+        processed_records = 0
+        load_stats = {'total_records': 0, 'successful_inserts': 0, 'failed_inserts': 0, 'categories_created': 0}
+        total_fields = missing_fields = anomaly_count = 0
+        seen_hashes = np.empty(0, dtype=np.uint64)
+        
+        try:
+            for batch in self.stream_csv_batches(csv_file_path):
+                raw_records += len(batch)
+                
+                # Drop rows already seen in earlier batches; in-batch duplicates are handled by the transform
+                row_hashes = pd.util.hash_pandas_object(batch, index=False).to_numpy()
+                fresh = ~np.isin(row_hashes, seen_hashes)
+                seen_hashes = np.union1d(seen_hashes, row_hashes)
+                
+                transformed = self.transform_transaction_data(batch[fresh].copy())
+                if transformed.empty:
+                    continue
+                
+                for key, value in self.load_to_database(transformed, user_id, commit=False).items():
+                    load_stats[key] += value
+                
+                processed_records += len(transformed)
+                total_fields += transformed.size
+                missing_fields += self._count_missing(transformed)
+                anomaly_count += int(transformed['is_anomaly'].to_numpy(dtype=bool).sum())
+            
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self._drop_stage_tables()
+        
+        # Categories created by any batch are cached only once committed
+        warm_category_cache(self.db)
+        
+        return {
+            'raw_records': raw_records,
+            'processed_records': processed_records,
+            'load_stats': load_stats,
+            'data_quality_score': self._score_data_quality(
+                processed_records, total_fields, missing_fields, anomaly_count
+            )
+        }
+    
     def _calculate_data_quality_score(self, df: pd.DataFrame) -> float:
         """Calculate data quality score based on completeness and validity"""
         total_fields = len(df) * len(df.columns)
-        missing_fields = df.isnull().sum().sum()
-        anomaly_count = df['is_anomaly'].sum()
+        missing_fields = self._count_missing(df)
+        anomaly_count = int(df['is_anomaly'].to_numpy(dtype=bool).sum())
+        
+        return self._score_data_quality(len(df), total_fields, missing_fields, anomaly_count)
+    
+    def _count_missing(self, df: pd.DataFrame) -> int:
+        """
+        Count missing cells column by column without building a boolean frame
+        Arrow-backed columns report their cached null count directly
+        """
+        missing = 0
+        for _, column in df.items():
+            dtype = column.dtype
+            if isinstance(dtype, pd.ArrowDtype) or (isinstance(dtype, pd.StringDtype) and dtype.storage == 'pyarrow'):
+                missing += column.array.__arrow_array__().null_count
+            else:
+                missing += int(np.count_nonzero(column.isna().to_numpy()))
+        
+        return missing
+    
+    def _score_data_quality(self, record_count: int, total_fields: int,
+                            missing_fields: int, anomaly_count: int) -> float:
+        """Combine completeness and anomaly rate into a 0-100 quality score"""
+        if record_count == 0:
+            return 0.0
         
         completeness_score = (total_fields - missing_fields) / total_fields
-        anomaly_score = 1 - (anomaly_count / len(df))
+        anomaly_score = 1 - (anomaly_count / record_count)
         
         return round((completeness_score * 0.7 + anomaly_score * 0.3) * 100, 2)
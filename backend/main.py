@@ -3,24 +3,76 @@ FinSight Financial Analytics API
 FastAPI-based backend demonstrating Python web development and SQL integration
 """
 
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from models.database import get_db, create_tables, User, Transaction, Category
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import get_db, create_tables, warm_category_cache, SessionLocal, async_engine, User, Transaction, Category
 from analytics.sql_analytics import FinancialAnalytics
 from data_pipeline.etl_processor import FinancialDataETL
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Dict, Optional
-import pandas as pd
+import asyncio
+import logging
+import shutil
 import tempfile
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import wraps
+from contextlib import asynccontextmanager
+from cachetools import TTLCache
+import msgspec
+import orjson
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# orjson-backed JSON responses
+def _json_default(obj):
+    """orjson fallback for datetime subclasses such as pandas Timestamp, with NaT/NA as null"""
+    # Matched by type name so the API module doesn't import pandas
+    if type(obj).__name__ in ('NaTType', 'NAType'):
+        return None
+    if isinstance(obj, datetime):
+        return datetime.combine(obj.date(), obj.timetz())
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class AnalyticsJSONResponse(ORJSONResponse):
+    """orjson rendering that also covers NumPy scalars and pandas Timestamps from DataFrame records"""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_json_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+        )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application startup and shutdown
+    Schema creation is a deploy step (python -m models.database); RUN_MIGRATIONS=1 opts back in at boot
+    """
+    if os.getenv("RUN_MIGRATIONS") == "1":
+        create_tables()
+    # Best effort: ETL fills the category cache lazily, so an unavailable database must not block boot
+    try:
+        with SessionLocal() as db:
+            warm_category_cache(db)
+    except Exception as e:
+        logger.warning(f"Could not warm category cache: {str(e)}")
+    yield
+    await async_engine.dispose()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="FinSight Analytics API",
     description="Advanced financial analytics platform with Python and SQL",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=AnalyticsJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend integration
@@ -33,11 +85,12 @@ app.add_middleware(
 )
 
 # Pydantic models for API requests/responses
-class UserCreate(BaseModel):
+# Request bodies are decoded straight from raw JSON by msgspec
+class UserCreate(msgspec.Struct, frozen=True, forbid_unknown_fields=True):
     email: str
     full_name: str
 
-class TransactionCreate(BaseModel):
+class TransactionCreate(msgspec.Struct, frozen=True, forbid_unknown_fields=True):
     category_id: int
     amount: float
     description: str
@@ -45,45 +98,151 @@ class TransactionCreate(BaseModel):
     merchant: Optional[str] = None
     payment_method: Optional[str] = None
 
+def request_body_schema(struct_type) -> Dict:
+    """OpenAPI requestBody for a msgspec struct, since FastAPI can't see manually decoded bodies"""
+    _, components = msgspec.json.schema_components((struct_type,))
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": components[struct_type.__name__]}}
+        }
+    }
+
+async def decode_body(request: Request, struct_type):
+    """Decode and validate a JSON request body, mapping msgspec errors to 422"""
+    try:
+        return msgspec.json.decode(await request.body(), type=struct_type)
+    except msgspec.MsgspecError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+# Response schema for OpenAPI docs; analytics handlers return plain dicts
 class AnalyticsResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='forbid', validate_default=False)
+    
     status: str
     data: Dict
     timestamp: datetime
 
-# Initialize database on startup
-@app.on_event("startup")
-async def startup_event():
-    create_tables()
+# Encoded analytics payloads keyed by (user_id, endpoint, params, latest transaction write)
+_response_cache = TTLCache(maxsize=1024, ttl=300)
+
+def invalidate_response_cache(user_id: int) -> None:
+    """Drop all cached analytics responses for a user"""
+    for key in [key for key in _response_cache if key[0] == user_id]:
+        _response_cache.pop(key, None)
+
+def cached_response(handler):
+    """
+    Cache an analytics endpoint's encoded payload until the user's transactions change
+    Hits skip the SQL, DataFrame and JSON encoding work; only the timestamp is stamped per request
+    """
+    @wraps(handler)
+    async def wrapper(**kwargs):
+        user_id, db = kwargs['user_id'], kwargs['db']
+        last_write = await db.scalar(
+            text("SELECT MAX(created_at) FROM transactions WHERE user_id = :user_id"),
+            {"user_id": user_id}
+        )
+        # End the probe's transaction before the handler hands work to a thread
+        await db.close()
+        params = tuple(sorted((name, value) for name, value in kwargs.items() if name not in ('user_id', 'db')))
+        key = (user_id, handler.__name__, params, last_write)
+        
+        cached = _response_cache.get(key)
+        if cached is None:
+            response = await handler(**kwargs)
+            if isinstance(response, Response):
+                cached = (response.body, response.media_type)
+            else:
+                cached = {
+                    name: orjson.Fragment(AnalyticsJSONResponse(value).body)
+                    for name, value in response.items() if name != 'timestamp'
+                }
+            _response_cache[key] = cached
+        
+        if isinstance(cached, dict):
+            return AnalyticsJSONResponse({**cached, "timestamp": datetime.now()})
+        body, media_type = cached
+        return Response(content=body, media_type=media_type)
+    
+    return wrapper
+
+# Arrow IPC responses for clients that send Accept: application/vnd.apache.arrow.stream
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+def response_format(accept: str = Header(default="")) -> str:
+    """Negotiated analytics payload format, 'arrow' or 'json'"""
+    return "arrow" if ARROW_STREAM_MEDIA_TYPE in accept else "json"
+
+def arrow_response(records, summary: Optional[Dict] = None) -> Response:
+    """
+    Analytics records as an Arrow IPC stream, keeping numbers and timestamps binary
+    Summary fields travel as JSON under the b'summary' schema metadata key
+    """
+    if isinstance(records, list):
+        table = pa.Table.from_pylist(records)
+    else:
+        table = pa.Table.from_pandas(records, preserve_index=False)
+    if summary is not None:
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"summary"] = AnalyticsJSONResponse(summary).body
+        table = table.replace_schema_metadata(metadata)
+    
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+def run_analytics(compute):
+    """Run pandas-backed analytics with a sync session; called via asyncio.to_thread"""
+    with SessionLocal() as db:
+        return compute(FinancialAnalytics(db))
+
+def run_etl(csv_file_path: str, user_id: int) -> Dict:
+    """Run the ETL pipeline with a sync session; called via asyncio.to_thread"""
+    with SessionLocal() as db:
+        return FinancialDataETL(db).run_full_pipeline(csv_file_path, user_id)
+
+# Static health check payload, serialized once at import
+ROOT_RESPONSE_BODY = orjson.dumps({
+    "message": "FinSight Analytics API",
+    "status": "operational",
+    "features": [
+        "Advanced SQL Analytics",
+        "ETL Data Pipeline",
+        "Financial Health Scoring",
+        "Spending Trend Analysis",
+        "Budget Variance Analysis"
+    ]
+})
 
 @app.get("/")
 async def root():
     """API health check endpoint"""
-    return {
-        "message": "FinSight Analytics API",
-        "status": "operational",
-        "features": [
-            "Advanced SQL Analytics",
-            "ETL Data Pipeline",
-            "Financial Health Scoring",
-            "Spending Trend Analysis",
-            "Budget Variance Analysis"
-        ]
-    }
+    return Response(content=ROOT_RESPONSE_BODY, media_type=AnalyticsJSONResponse.media_type)
 
-@app.post("/users/", response_model=Dict)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+@app.post("/users/", response_model=Dict, openapi_extra=request_body_schema(UserCreate))
+async def create_user(request: Request, db: AsyncSession = Depends(get_db)):
     """Create new user with financial profile"""
+    user = await decode_body(request, UserCreate)
     try:
-        db_user = User(email=user.email, full_name=user.full_name)
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        # INSERT ... RETURNING id, so no refresh round-trip is needed
+        user_id = await db.scalar(
+            insert(User).values(email=user.email, full_name=user.full_name).returning(User.id)
+        )
+        await db.commit()
         
         return {
             "status": "success",
-            "user_id": db_user.id,
+            "user_id": user_id,
             "message": "User created successfully"
         }
+    except IntegrityError as e:
+        await db.rollback()
+        if getattr(e.orig, 'sqlstate', None) == '23505':
+            raise HTTPException(status_code=409, detail="A user with this email already exists")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -91,7 +250,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
 async def upload_transactions(
     user_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Upload and process financial transaction data via ETL pipeline
@@ -99,20 +258,24 @@ async def upload_transactions(
     """
     try:
         # Verify user exists
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        user_exists = await db.scalar(select(1).where(User.id == user_id))
+        # Hand the connection back to the pool rather than idle in transaction through the ETL run
+        await db.close()
+        if not user_exists:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Save uploaded file temporarily
+        # Save uploaded file temporarily, copied in 1 MiB chunks on a worker thread
         with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
+            await asyncio.to_thread(shutil.copyfileobj, file.file, tmp_file, 1 << 20)
             tmp_file_path = tmp_file.name
         
         try:
-            # Run ETL pipeline
-            etl_processor = FinancialDataETL(db)
-            pipeline_result = etl_processor.run_full_pipeline(tmp_file_path, user_id)
+            # Run ETL pipeline off the event loop
+            pipeline_result = await asyncio.to_thread(run_etl, tmp_file_path, user_id)
+            invalidate_response_cache(user_id)
+            
+            if pipeline_result['status'] != 'success':
+                raise HTTPException(status_code=500, detail=f"ETL pipeline failed: {pipeline_result['error']}")
             
             return {
                 "status": "success",
@@ -124,149 +287,184 @@ async def upload_transactions(
             # Clean up temporary file
             os.unlink(tmp_file_path)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/analytics/spending-trends/{user_id}")
+@app.get("/analytics/spending-trends/{user_id}", response_model=AnalyticsResponse)
+@cached_response
 async def get_spending_trends(
     user_id: int,
     months: int = 12,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    fmt: str = Depends(response_format)
 ):
     """
     Advanced spending trend analysis using SQL window functions
     Demonstrates complex SQL analytics capabilities
     """
     try:
-        analytics = FinancialAnalytics(db)
-        trends_df = analytics.get_spending_trends(user_id, months)
+        trends_df = await asyncio.to_thread(run_analytics, lambda analytics: analytics.get_spending_trends(user_id, months))
+        
+        # Summarize before serializing so the frame is scanned once per statistic
+        summary = {
+            "total_categories": int(trends_df['category'].nunique()),
+            "analysis_period_months": months,
+            "total_transactions": int(trends_df['transaction_count'].sum())
+        }
         
-        return AnalyticsResponse(
-            status="success",
-            data={
+        if fmt == "arrow":
+            return arrow_response(trends_df, summary)
+        
+        return {
+            "status": "success",
+            "data": {
                 "trends": trends_df.to_dict('records'),
-                "summary": {
-                    "total_categories": len(trends_df['category'].unique()),
-                    "analysis_period_months": months,
-                    "total_transactions": trends_df['transaction_count'].sum()
-                }
+                "summary": summary
             },
-            timestamp=datetime.now()
-        )
+            "timestamp": datetime.now()
+        }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/analytics/budget-variance/{user_id}")
-async def get_budget_variance(user_id: int, db: Session = Depends(get_db)):
+@app.get("/analytics/budget-variance/{user_id}", response_model=AnalyticsResponse)
+@cached_response
+async def get_budget_variance(user_id: int, db: AsyncSession = Depends(get_db), fmt: str = Depends(response_format)):
     """
     Budget variance analysis with statistical insights
     Demonstrates JOIN operations and complex SQL aggregations
     """
     try:
-        analytics = FinancialAnalytics(db)
-        variance_df = analytics.budget_variance_analysis(user_id)
+        variance_df = await asyncio.to_thread(run_analytics, lambda analytics: analytics.budget_variance_analysis(user_id))
+        summary = {
+            "total_budgets": len(variance_df),
+            "over_budget_count": int((variance_df['budget_status'] == 'Over Budget').sum()),
+            "avg_variance_percentage": variance_df['variance_percentage'].mean()
+        }
+        
+        if fmt == "arrow":
+            return arrow_response(variance_df, summary)
         
-        return AnalyticsResponse(
-            status="success",
-            data={
+        return {
+            "status": "success",
+            "data": {
                 "variance_analysis": variance_df.to_dict('records'),
-                "summary": {
-                    "total_budgets": len(variance_df),
-                    "over_budget_count": len(variance_df[variance_df['budget_status'] == 'Over Budget']),
-                    "avg_variance_percentage": variance_df['variance_percentage'].mean()
-                }
+                "summary": summary
             },
-            timestamp=datetime.now()
-        )
+            "timestamp": datetime.now()
+        }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/analytics/savings-analysis/{user_id}")
-async def get_savings_analysis(user_id: int, db: Session = Depends(get_db)):
+@app.get("/analytics/savings-analysis/{user_id}", response_model=AnalyticsResponse)
+@cached_response
+async def get_savings_analysis(user_id: int, db: AsyncSession = Depends(get_db), fmt: str = Depends(response_format)):
     """
     Comprehensive savings and investment analysis
     Demonstrates advanced SQL subqueries and conditional aggregations
     """
     try:
-        analytics = FinancialAnalytics(db)
-        savings_data = analytics.savings_investment_analysis(user_id)
+        savings_data = await asyncio.to_thread(run_analytics, lambda analytics: analytics.savings_investment_analysis(user_id))
         
-        return AnalyticsResponse(
-            status="success",
-            data=savings_data,
-            timestamp=datetime.now()
-        )
+        if fmt == "arrow":
+            summary = {key: value for key, value in savings_data.items() if key != 'monthly_data'}
+            return arrow_response(savings_data['monthly_data'], summary)
+        
+        return {
+            "status": "success",
+            "data": savings_data,
+            "timestamp": datetime.now()
+        }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/analytics/financial-health/{user_id}")
-async def get_financial_health(user_id: int, db: Session = Depends(get_db)):
+@app.get("/analytics/financial-health/{user_id}", response_model=AnalyticsResponse)
+@cached_response
+async def get_financial_health(user_id: int, db: AsyncSession = Depends(get_db), fmt: str = Depends(response_format)):
     """
     Financial health scoring using advanced SQL calculations
     Demonstrates complex business logic implementation
     """
     try:
-        analytics = FinancialAnalytics(db)
-        health_data = analytics.financial_health_score(user_id)
+        health_data = await asyncio.to_thread(run_analytics, lambda analytics: analytics.financial_health_score(user_id))
         
-        return AnalyticsResponse(
-            status="success",
-            data=health_data,
-            timestamp=datetime.now()
-        )
+        if fmt == "arrow":
+            return arrow_response([health_data])
+        
+        return {
+            "status": "success",
+            "data": health_data,
+            "timestamp": datetime.now()
+        }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/analytics/expense-insights/{user_id}")
-async def get_expense_insights(user_id: int, db: Session = Depends(get_db)):
+@app.get("/analytics/expense-insights/{user_id}", response_model=AnalyticsResponse)
+@cached_response
+async def get_expense_insights(user_id: int, db: AsyncSession = Depends(get_db), fmt: str = Depends(response_format)):
     """
     ML-ready expense categorization insights
     Demonstrates data preparation for machine learning models
     """
     try:
-        analytics = FinancialAnalytics(db)
-        insights_df = analytics.expense_categorization_insights(user_id)
+        insights_df = await asyncio.to_thread(run_analytics, lambda analytics: analytics.expense_categorization_insights(user_id))
         
         # Calculate additional insights
-        anomaly_count = len(insights_df[insights_df['anomaly_flag'] != 'normal'])
-        top_categories = insights_df.groupby('category')['amount'].sum().sort_values(ascending=False).head(5)
+        expense_count = len(insights_df)
+        anomaly_count = int((insights_df['anomaly_flag'].to_numpy() != 'normal').sum())
+        top_categories = insights_df.groupby('category', sort=False)['amount'].sum().nlargest(5)
+        insights = {
+            "total_expenses": expense_count,
+            "anomaly_count": anomaly_count,
+            "anomaly_percentage": (anomaly_count / expense_count) * 100 if expense_count else 0.0,
+            "top_spending_categories": top_categories.to_dict()
+        }
+        
+        if fmt == "arrow":
+            return arrow_response(insights_df, insights)
         
-        return AnalyticsResponse(
-            status="success",
-            data={
+        return {
+            "status": "success",
+            "data": {
                 "expense_features": insights_df.to_dict('records'),
-                "insights": {
-                    "total_expenses": len(insights_df),
-                    "anomaly_count": anomaly_count,
-                    "anomaly_percentage": (anomaly_count / len(insights_df)) * 100,
-                    "top_spending_categories": top_categories.to_dict()
-                }
+                "insights": insights
             },
-            timestamp=datetime.now()
-        )
+            "timestamp": datetime.now()
+        }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/database/stats")
-async def get_database_stats(db: Session = Depends(get_db)):
+async def get_database_stats(db: AsyncSession = Depends(get_db)):
     """
     Database statistics and health metrics
     Demonstrates SQL aggregation and system monitoring
     """
     try:
+        # One round-trip for all counts
+        counts = (await db.execute(
+            text("""
+                SELECT
+                    (SELECT COUNT(*) FROM users) AS total_users,
+                    (SELECT COUNT(*) FROM transactions) AS total_transactions,
+                    (SELECT COUNT(*) FROM categories) AS total_categories,
+                    (SELECT COUNT(*) FROM transactions WHERE created_at >= :cutoff) AS transactions_last_30_days
+            """),
+            {"cutoff": datetime.now() - timedelta(days=30)}
+        )).one()
+        
         stats = {
-            "total_users": db.query(User).count(),
-            "total_transactions": db.query(Transaction).count(),
-            "total_categories": db.query(Category).count(),
+            "total_users": counts.total_users,
+            "total_transactions": counts.total_transactions,
+            "total_categories": counts.total_categories,
             "recent_activity": {
-                "transactions_last_30_days": db.query(Transaction).filter(
-                    Transaction.created_at >= datetime.now() - pd.Timedelta(days=30)
-                ).count()
+                "transactions_last_30_days": counts.transactions_last_30_days
             }
         }
         
@@ -0,0 +1,88 @@
+-- FinSight Transaction Rollup Migration
+-- Incrementally maintained daily aggregates backing the financial health score
+-- Safe to re-run; also applied by create_all through models.database
+
+-- Daily totals per user and category; days are UTC dates so keys don't depend on the session TimeZone
+CREATE TABLE IF NOT EXISTS transaction_daily_rollup (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    total_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day, category_id)
+);
+
+-- Apply a statement's changed rows to the rollup
+-- Statement-level with transition tables so a COPY batch costs one upsert per group
+CREATE OR REPLACE FUNCTION apply_transaction_daily_rollup()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO transaction_daily_rollup (user_id, day, category_id, total_amount, transaction_count)
+        SELECT user_id, (transaction_date AT TIME ZONE 'UTC')::date, category_id, -SUM(amount), -COUNT(*)
+        FROM old_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, day, category_id) DO UPDATE
+        SET total_amount = transaction_daily_rollup.total_amount + EXCLUDED.total_amount,
+            transaction_count = transaction_daily_rollup.transaction_count + EXCLUDED.transaction_count;
+
+        DELETE FROM transaction_daily_rollup r
+        USING (SELECT DISTINCT user_id, (transaction_date AT TIME ZONE 'UTC')::date AS day, category_id FROM old_rows) o
+        WHERE r.user_id = o.user_id
+            AND r.day = o.day
+            AND r.category_id = o.category_id
+            AND r.transaction_count = 0;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO transaction_daily_rollup (user_id, day, category_id, total_amount, transaction_count)
+        SELECT user_id, (transaction_date AT TIME ZONE 'UTC')::date, category_id, SUM(amount), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, day, category_id) DO UPDATE
+        SET total_amount = transaction_daily_rollup.total_amount + EXCLUDED.total_amount,
+            transaction_count = transaction_daily_rollup.transaction_count + EXCLUDED.transaction_count;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables require one trigger per event
+DROP TRIGGER IF EXISTS transactions_rollup_insert ON transactions;
+DROP TRIGGER IF EXISTS transactions_rollup_update ON transactions;
+DROP TRIGGER IF EXISTS transactions_rollup_delete ON transactions;
+
+CREATE TRIGGER transactions_rollup_insert
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_transaction_daily_rollup();
+
+CREATE TRIGGER transactions_rollup_update
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_transaction_daily_rollup();
+
+CREATE TRIGGER transactions_rollup_delete
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_transaction_daily_rollup();
+
+-- Rebuild from existing transactions; the lock holds writers back so no trigger delta is lost
+-- Also upgrades rollups created with session-zone timestamp days and DECIMAL totals
+DO $$
+BEGIN
+    LOCK TABLE transactions IN SHARE MODE;
+    TRUNCATE transaction_daily_rollup;
+    ALTER TABLE transaction_daily_rollup
+        ALTER COLUMN day TYPE DATE USING day::date,
+        ALTER COLUMN total_amount TYPE DOUBLE PRECISION;
+    INSERT INTO transaction_daily_rollup (user_id, day, category_id, total_amount, transaction_count)
+    SELECT user_id, (transaction_date AT TIME ZONE 'UTC')::date, category_id, SUM(amount), COUNT(*)
+    FROM transactions
+    GROUP BY 1, 2, 3;
+END;
+$$;
+
+COMMENT ON TABLE transaction_daily_rollup IS 'Daily transaction totals per user and category, maintained by trigger';
+COMMENT ON FUNCTION apply_transaction_daily_rollup IS 'Apply inserted, updated or deleted transactions to the daily rollup';
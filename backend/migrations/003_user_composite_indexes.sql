@@ -0,0 +1,14 @@
+-- FinSight Composite Index Migration
+-- Per-user indexes for analytics, stats and budget lookups
+-- Built CONCURRENTLY so existing deployments keep accepting writes; run outside a transaction block
+
+-- Latest-write lookups for response caching and recent activity stats
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_created ON transactions(user_id, created_at);
+
+-- Per-user category breakdowns
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_category ON transactions(user_id, category_id);
+
+-- Budget variance lookups by user, category and period start
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_budgets_user_category_start ON budgets(user_id, category_id, start_date);
+
+-- (user_id, transaction_date) is already covered by idx_transactions_user_date from 001
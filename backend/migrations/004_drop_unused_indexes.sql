@@ -0,0 +1,23 @@
+-- FinSight Index Cleanup Migration
+-- Drops indexes no query filters or sorts on; each one only added write and vacuum cost
+-- Run outside a transaction block (DROP INDEX CONCURRENTLY)
+
+-- No query filters on amount, merchant or tags
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_amount;
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_merchant;
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_expenses;
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_income;
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_tags;
+
+-- Date filters are always per user and use idx_transactions_user_date
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_date_range;
+
+-- Budgets are looked up by user only, covered by idx_budgets_user_category_start
+DROP INDEX CONCURRENTLY IF EXISTS idx_budgets_user_period;
+
+-- Duplicates of primary keys left by earlier create_all() deployments
+DROP INDEX CONCURRENTLY IF EXISTS ix_users_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_categories_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_transactions_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_budgets_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_financial_goals_id;
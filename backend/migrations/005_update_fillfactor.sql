@@ -0,0 +1,6 @@
+-- FinSight Storage Tuning Migration
+-- Reserve free space on transaction and budget pages for HOT updates
+
+-- Applies to newly written pages; VACUUM FULL or pg_repack rewrites existing ones
+ALTER TABLE transactions SET (fillfactor = 90);
+ALTER TABLE budgets SET (fillfactor = 90);
@@ -6,19 +6,77 @@ Demonstrates data science techniques with Python, pandas, and scikit-learn
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+from numba import njit
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
 import plotly.express as px
 import plotly.graph_objects as go
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
+# Training sets above this size use histogram gradient boosting instead of a random forest
+HIST_GRADIENT_BOOSTING_MIN_ROWS = 50_000
+
+# Feature matrices above this size are clustered with mini-batch k-means
+MINI_BATCH_KMEANS_MIN_ROWS = 10_000
+
+# Rows fetched from the server-side cursor per chunk when loading transactions
+LOAD_CHUNK_ROWS = 50_000
+
+# Payment methods assigned by the ETL pipeline's description matching, in dummy column order
+KNOWN_PAYMENT_METHODS = ('Bank Transfer', 'Cash', 'Check', 'Credit Card', 'Debit Card', 'Unknown')
+
+@njit(cache=True)
+def health_score_kernel(savings_rate, expense_ratio, net_cash_flow, savings_rate_3m, expense_ratio_3m, out):
+    """
+    Financial health score per month, compiled once and cached on disk
+    Operates on raw float64 column arrays and writes into a preallocated out array
+    """
+    for i in range(savings_rate.size):
+        score = 0
+        
+        # Savings rate component (40% of score)
+        if savings_rate[i] >= 20:
+            score += 40
+        elif savings_rate[i] >= 15:
+            score += 30
+        elif savings_rate[i] >= 10:
+            score += 20
+        elif savings_rate[i] >= 5:
+            score += 10
+        
+        # Expense ratio component (30% of score)
+        if expense_ratio[i] <= 70:
+            score += 30
+        elif expense_ratio[i] <= 80:
+            score += 25
+        elif expense_ratio[i] <= 90:
+            score += 15
+        elif expense_ratio[i] <= 100:
+            score += 5
+        
+        # Cash flow component (20% of score)
+        if net_cash_flow[i] > 0:
+            score += 20
+        elif net_cash_flow[i] >= -100:
+            score += 10
+        
+        # Trend component (10% of score)
+        if not np.isnan(savings_rate_3m[i]) and savings_rate[i] > savings_rate_3m[i]:
+            score += 5
+        if not np.isnan(expense_ratio_3m[i]) and expense_ratio[i] < expense_ratio_3m[i]:
+            score += 5
+        
+        out[i] = min(100, max(0, score))
+
 class FinancialDataScience:
     """
     Advanced financial data science analysis class
@@ -27,7 +85,6 @@ class FinancialDataScience:
     
     def __init__(self, database_url: str):
         self.engine = create_engine(database_url)
-        self.scaler = StandardScaler()
         
     def load_transaction_data(self, user_id: int = None) -> pd.DataFrame:
         """
@@ -47,25 +104,47 @@ class FinancialDataScience:
             t.is_recurring,
             c.name as category,
             c.category_type,
-            EXTRACT(HOUR FROM t.transaction_date) as hour_of_day,
-            EXTRACT(DOW FROM t.transaction_date) as day_of_week,
-            EXTRACT(MONTH FROM t.transaction_date) as month,
-            EXTRACT(YEAR FROM t.transaction_date) as year
+            EXTRACT(HOUR FROM t.transaction_date)::int as hour_of_day,
+            EXTRACT(DOW FROM t.transaction_date)::int as day_of_week,
+            EXTRACT(MONTH FROM t.transaction_date)::int as month,
+            EXTRACT(YEAR FROM t.transaction_date)::int as year,
+            EXTRACT(DOW FROM t.transaction_date) IN (0, 6) as is_weekend,
+            DATE_TRUNC('month', t.transaction_date)::timestamp as transaction_month_year,
+            EXTRACT(DAY FROM t.transaction_date - MIN(t.transaction_date) OVER ())::int as days_since_first_transaction
         FROM transactions t
         JOIN categories c ON t.category_id = c.id
         """
+        params = {}
         
         if user_id:
-            query += f" WHERE t.user_id = {user_id}"
-            
-        df = pd.read_sql(query, self.engine)
-        
-        # Feature engineering
-        df['is_weekend'] = df['day_of_week'].isin([0, 6])  # Sunday=0, Saturday=6
-        df['transaction_month_year'] = pd.to_datetime(df[['year', 'month']].assign(day=1))
-        df['days_since_first_transaction'] = (df['transaction_date'] - df['transaction_date'].min()).dt.days
-        
-        return df
+            query += " WHERE t.user_id = :user_id"
+            params["user_id"] = user_id
+        
+        # Feature engineering happens in the SELECT, so pandas only parses the dates
+        # A server-side cursor feeds LOAD_CHUNK_ROWS rows at a time into compact Arrow-backed
+        # chunks, so only one chunk of Python row tuples is alive at once
+        # Nullable columns get fixed types so an all-NULL chunk can't infer a null column
+        # EXTRACT returns numeric on PostgreSQL 14+, so calendar parts are cast to int in SQL
+        # and narrowed to the small integers they fit in as each chunk arrives
+        with self.engine.connect().execution_options(stream_results=True) as connection:
+            chunks = pd.read_sql(
+                text(query),
+                connection,
+                params=params,
+                parse_dates=['transaction_date', 'transaction_month_year'],
+                chunksize=LOAD_CHUNK_ROWS,
+                dtype={
+                    'merchant': pd.ArrowDtype(pa.string()),
+                    'payment_method': pd.ArrowDtype(pa.string()),
+                    'is_recurring': 'bool[pyarrow]',
+                    'hour_of_day': 'int8[pyarrow]',
+                    'day_of_week': 'int8[pyarrow]',
+                    'month': 'int8[pyarrow]',
+                    'year': 'int16[pyarrow]'
+                },
+                dtype_backend='pyarrow'
+            )
+            return pd.concat(chunks, ignore_index=True)
     
     def spending_pattern_clustering(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -74,51 +153,47 @@ class FinancialDataScience:
         """
         print("🔍 Performing spending pattern clustering analysis...")
         
-        # Prepare features for clustering
-        monthly_features = df.groupby(['user_id', 'transaction_month_year', 'category']).agg({
-            'amount_abs': ['sum', 'mean', 'count'],
-            'is_weekend': 'mean',
-            'hour_of_day': 'mean'
-        }).reset_index()
-        
-        # Flatten column names
-        monthly_features.columns = ['_'.join(col).strip() if col[1] else col[0] 
-                                  for col in monthly_features.columns.values]
-        
-        # Pivot to get category spending as features
-        pivot_features = monthly_features.pivot_table(
-            index=['user_id_', 'transaction_month_year_'],
-            columns='category_',
-            values='amount_abs_sum',
-            fill_value=0
-        ).reset_index()
-        
-        # Select numeric columns for clustering
-        feature_cols = [col for col in pivot_features.columns if col not in ['user_id_', 'transaction_month_year_']]
-        X = pivot_features[feature_cols]
-        
-        # Standardize features
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Perform K-means clustering
-        kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
+        # Monthly category spending per user as features, in a single groupby and unstack
+        X = df.groupby(['user_id', 'transaction_month_year', 'category'])['amount_abs'].sum().unstack(
+            'category', fill_value=0
+        )
+        pivot_features = X.reset_index()
+        
+        # Standardize features in one pass; constant columns keep a unit scale like StandardScaler
+        X_values = X.to_numpy(dtype=np.float64)
+        mean = X_values.mean(axis=0)
+        std = X_values.std(axis=0)
+        std[std == 0] = 1.0
+        X_scaled = (X_values - mean) / std
+        
+        # Perform K-means clustering; mini-batches for large inputs, Elkan's triangle-inequality bounds otherwise
+        if len(X_scaled) > MINI_BATCH_KMEANS_MIN_ROWS:
+            kmeans = MiniBatchKMeans(n_clusters=4, random_state=42, n_init=3, batch_size=1024, max_iter=100)
+        else:
+            kmeans = KMeans(n_clusters=4, init='k-means++', n_init=1, algorithm='elkan', random_state=42)
         clusters = kmeans.fit_predict(X_scaled)
         
         # Add cluster labels to dataframe
         pivot_features['spending_cluster'] = clusters
         
-        # Analyze cluster characteristics
-        cluster_analysis = []
-        for cluster in range(4):
-            cluster_data = X[clusters == cluster]
-            cluster_profile = {
+        # Analyze cluster characteristics with one groupby per statistic
+        by_cluster = pd.Series(clusters, index=X.index, name='cluster')
+        row_totals = pd.Series(X_values.sum(axis=1), index=X.index).groupby(by_cluster)
+        sizes = row_totals.size()
+        avg_total_spending = row_totals.mean()
+        spending_variance = row_totals.std()
+        category_means = X.groupby(by_cluster).mean()
+        
+        cluster_analysis = [
+            {
                 'cluster': cluster,
-                'size': len(cluster_data),
-                'avg_total_spending': cluster_data.sum(axis=1).mean(),
-                'top_categories': cluster_data.mean().nlargest(3).to_dict(),
-                'spending_variance': cluster_data.sum(axis=1).std()
+                'size': int(sizes.get(cluster, 0)),
+                'avg_total_spending': avg_total_spending.get(cluster, np.nan),
+                'top_categories': category_means.loc[cluster].nlargest(3).to_dict() if cluster in category_means.index else {},
+                'spending_variance': spending_variance.get(cluster, np.nan)
             }
-            cluster_analysis.append(cluster_profile)
+            for cluster in range(4)
+        ]
         
         print(f"✅ Identified {len(cluster_analysis)} distinct spending patterns")
         return pivot_features, cluster_analysis
@@ -133,28 +208,38 @@ class FinancialDataScience:
         # Prepare features for classification
         expense_data = df[df['category_type'] == 'expense'].copy()
         
-        # Text feature engineering
-        expense_data['description_length'] = expense_data['description'].str.len()
-        expense_data['has_numbers'] = expense_data['description'].str.contains(r'\d+').astype(int)
-        expense_data['word_count'] = expense_data['description'].str.split().str.len()
+        # Text feature engineering on Arrow string kernels
+        description = expense_data['description'].astype('string[pyarrow]')
+        expense_data['description_length'] = description.str.len()
+        expense_data['has_numbers'] = description.str.contains(r'\d', regex=True).astype(int)
+        expense_data['word_count'] = description.str.count(r'\S+')
         
         # Create dummy variables for categorical features
         feature_columns = ['amount_abs', 'hour_of_day', 'day_of_week', 'month', 
                           'is_weekend', 'description_length', 'has_numbers', 'word_count']
         
-        # Add payment method dummies
-        payment_dummies = pd.get_dummies(expense_data['payment_method'], prefix='payment')
-        feature_df = pd.concat([expense_data[feature_columns], payment_dummies], axis=1)
+        # Add payment method dummies over the fixed method domain; missing or unrecognised methods stay all zero
+        payment_codes = pd.Categorical(expense_data['payment_method'], categories=KNOWN_PAYMENT_METHODS).codes
+        known_rows = np.flatnonzero(payment_codes >= 0)
+        payment_dummies = np.zeros((len(payment_codes), len(KNOWN_PAYMENT_METHODS)), dtype=np.uint8)
+        payment_dummies[known_rows, payment_codes[known_rows]] = 1
+        feature_df = expense_data[feature_columns].assign(**{
+            f'payment_{method}': payment_dummies[:, i] for i, method in enumerate(KNOWN_PAYMENT_METHODS)
+        })
         
-        # Prepare target variable
-        y = expense_data['category']
-        X = feature_df.fillna(0)
+        # Prepare target variable as integer codes and features as one contiguous float32 block
+        categories = pd.Categorical(expense_data['category'])
+        y = categories.codes
+        X = np.ascontiguousarray(feature_df.fillna(0).to_numpy(dtype=np.float32))
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        # Train Random Forest model
-        rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
+        # Train Random Forest model across all cores, or binned gradient boosting for large sets
+        if len(X_train) > HIST_GRADIENT_BOOSTING_MIN_ROWS:
+            rf_model = HistGradientBoostingClassifier(max_iter=200, early_stopping=True, random_state=42)
+        else:
+            rf_model = RandomForestClassifier(n_estimators=100, n_jobs=-1, random_state=42)
         rf_model.fit(X_train, y_train)
         
         # Make predictions
@@ -162,9 +247,15 @@ class FinancialDataScience:
         
         # Model evaluation
         accuracy = rf_model.score(X_test, y_test)
+        if hasattr(rf_model, 'feature_importances_'):
+            importances = rf_model.feature_importances_
+        else:
+            importances = permutation_importance(
+                rf_model, X_test, y_test, n_repeats=5, random_state=42, n_jobs=-1
+            ).importances_mean
         feature_importance = pd.DataFrame({
-            'feature': X.columns,
-            'importance': rf_model.feature_importances_
+            'feature': feature_df.columns,
+            'importance': importances
         }).sort_values('importance', ascending=False)
         
         print(f"✅ Model trained with {accuracy:.2%} accuracy")
@@ -173,7 +264,9 @@ class FinancialDataScience:
             'model': rf_model,
             'accuracy': accuracy,
             'feature_importance': feature_importance.to_dict('records'),
-            'classification_report': classification_report(y_test, y_pred, output_dict=True)
+            'classification_report': classification_report(
+                categories.categories[y_test], categories.categories[y_pred], output_dict=True
+            )
         }
     
     def financial_health_scoring(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -183,14 +276,13 @@ class FinancialDataScience:
         """
         print("📊 Calculating comprehensive financial health scores...")
         
-        # Calculate monthly financial metrics by user
-        monthly_metrics = df.groupby(['user_id', 'transaction_month_year']).agg({
-            'amount': lambda x: x[df.loc[x.index, 'category_type'] == 'income'].sum(),
-            'amount_abs': [
-                lambda x: x[df.loc[x.index, 'category_type'] == 'expense'].sum(),
-                lambda x: x[df.loc[x.index, 'category_type'] == 'savings'].sum()
-            ]
-        }).reset_index()
+        # Calculate monthly financial metrics by user with one cython groupby sum
+        category_type = df['category_type'].to_numpy()
+        monthly_metrics = df.assign(
+            income=np.where(category_type == 'income', df['amount'], 0.0),
+            expense=np.where(category_type == 'expense', df['amount_abs'], 0.0),
+            savings=np.where(category_type == 'savings', df['amount_abs'], 0.0)
+        ).groupby(['user_id', 'transaction_month_year'])[['income', 'expense', 'savings']].sum().reset_index()
         
         # Flatten column names
         monthly_metrics.columns = ['user_id', 'month', 'total_income', 'total_expenses', 'total_savings']
@@ -204,62 +296,28 @@ class FinancialDataScience:
                                           monthly_metrics['total_expenses'] - 
                                           monthly_metrics['total_savings'])
         
-        # Calculate rolling averages for trend analysis
-        monthly_metrics['savings_rate_3m'] = monthly_metrics.groupby('user_id')['savings_rate'].rolling(3).mean().reset_index(0, drop=True)
-        monthly_metrics['expense_ratio_3m'] = monthly_metrics.groupby('user_id')['expense_ratio'].rolling(3).mean().reset_index(0, drop=True)
-        
-        # Financial health scoring algorithm
-        def calculate_health_score(row):
-            score = 0
-            
-            # Savings rate component (40% of score)
-            if row['savings_rate'] >= 20:
-                score += 40
-            elif row['savings_rate'] >= 15:
-                score += 30
-            elif row['savings_rate'] >= 10:
-                score += 20
-            elif row['savings_rate'] >= 5:
-                score += 10
-            
-            # Expense ratio component (30% of score)
-            if row['expense_ratio'] <= 70:
-                score += 30
-            elif row['expense_ratio'] <= 80:
-                score += 25
-            elif row['expense_ratio'] <= 90:
-                score += 15
-            elif row['expense_ratio'] <= 100:
-                score += 5
-            
-            # Cash flow component (20% of score)
-            if row['net_cash_flow'] > 0:
-                score += 20
-            elif row['net_cash_flow'] >= -100:
-                score += 10
-            
-            # Trend component (10% of score)
-            if not pd.isna(row['savings_rate_3m']) and row['savings_rate'] > row['savings_rate_3m']:
-                score += 5
-            if not pd.isna(row['expense_ratio_3m']) and row['expense_ratio'] < row['expense_ratio_3m']:
-                score += 5
-            
-            return min(100, max(0, score))
-        
-        monthly_metrics['health_score'] = monthly_metrics.apply(calculate_health_score, axis=1)
+        # Calculate rolling averages for trend analysis; rows are already sorted by user and month,
+        # so a 3-month window is valid wherever the row two back belongs to the same user
+        user_ids = monthly_metrics['user_id'].to_numpy()
+        same_user_window = np.zeros(len(user_ids), dtype=bool)
+        same_user_window[2:] = user_ids[2:] == user_ids[:-2]
+        rolling_means = monthly_metrics[['savings_rate', 'expense_ratio']].rolling(3).mean()
+        monthly_metrics['savings_rate_3m'] = rolling_means['savings_rate'].where(same_user_window)
+        monthly_metrics['expense_ratio_3m'] = rolling_means['expense_ratio'].where(same_user_window)
+        
+        # Financial health scoring algorithm, compiled over the column arrays
+        score_columns = ['savings_rate', 'expense_ratio', 'net_cash_flow', 'savings_rate_3m', 'expense_ratio_3m']
+        health_score = np.empty(len(monthly_metrics), dtype=np.int64)
+        health_score_kernel(*(monthly_metrics[col].to_numpy(dtype=np.float64) for col in score_columns), health_score)
+        monthly_metrics['health_score'] = health_score
         
         # Assign health grades
-        def assign_grade(score):
-            if score >= 85:
-                return 'Excellent'
-            elif score >= 70:
-                return 'Good'
-            elif score >= 55:
-                return 'Fair'
-            else:
-                return 'Needs Improvement'
-        
-        monthly_metrics['health_grade'] = monthly_metrics['health_score'].apply(assign_grade)
+        monthly_metrics['health_grade'] = pd.cut(
+            monthly_metrics['health_score'],
+            bins=[0, 55, 70, 85, 101],
+            labels=['Needs Improvement', 'Fair', 'Good', 'Excellent'],
+            right=False
+        )
         
         print("✅ Financial health scores calculated successfully")
         return monthly_metrics
@@ -271,50 +329,46 @@ class FinancialDataScience:
         """
         print("🚨 Performing anomaly detection analysis...")
         
-        # Calculate statistical thresholds by category and user
-        anomaly_results = []
-        
-        for (user_id, category), group in df.groupby(['user_id', 'category']):
-            if len(group) < 10:  # Skip categories with too few transactions
-                continue
-                
-            amounts = group['amount_abs']
-            
-            # Statistical methods for anomaly detection
-            Q1 = amounts.quantile(0.25)
-            Q3 = amounts.quantile(0.75)
-            IQR = Q3 - Q1
-            
-            # IQR method
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            # Z-score method
-            mean_amount = amounts.mean()
-            std_amount = amounts.std()
-            z_threshold = 2.5
-            
-            for idx, row in group.iterrows():
-                amount = row['amount_abs']
-                z_score = abs((amount - mean_amount) / std_amount) if std_amount > 0 else 0
-                
-                anomaly_flags = {
-                    'transaction_id': row['id'],
-                    'user_id': user_id,
-                    'category': category,
-                    'amount': amount,
-                    'transaction_date': row['transaction_date'],
-                    'description': row['description'],
-                    'is_iqr_anomaly': amount < lower_bound or amount > upper_bound,
-                    'is_zscore_anomaly': z_score > z_threshold,
-                    'z_score': z_score,
-                    'category_mean': mean_amount,
-                    'category_std': std_amount
-                }
-                
-                anomaly_results.append(anomaly_flags)
-        
-        anomaly_df = pd.DataFrame(anomaly_results)
+        # Per user/category statistics, with both quartiles from one grouped quantile pass
+        group_keys = ['user_id', 'category']
+        grouped = df.groupby(group_keys)['amount_abs']
+        quartiles = grouped.quantile([0.25, 0.75]).unstack()
+        quartiles.columns = ['q1', 'q3']
+        stats = quartiles.join(grouped.agg(['mean', 'std', 'size']))
+        
+        # Skip categories with too few transactions
+        stats = stats[stats['size'] >= 10]
+        
+        # Join the statistics back onto each transaction
+        data = df.sort_values(group_keys, kind='stable').merge(stats, left_on=group_keys, right_index=True)
+        amounts = data['amount_abs']
+        mean_amount = data['mean']
+        std_amount = data['std']
+        Q1 = data['q1']
+        Q3 = data['q3']
+        IQR = Q3 - Q1
+        
+        # IQR method
+        lower_bound = Q1 - 1.5 * IQR
+        upper_bound = Q3 + 1.5 * IQR
+        
+        # Z-score method
+        z_threshold = 2.5
+        z_score = ((amounts - mean_amount) / std_amount).abs().where(std_amount > 0, 0.0)
+        
+        anomaly_df = pd.DataFrame({
+            'transaction_id': data['id'],
+            'user_id': data['user_id'],
+            'category': data['category'],
+            'amount': amounts,
+            'transaction_date': data['transaction_date'],
+            'description': data['description'],
+            'is_iqr_anomaly': (amounts < lower_bound) | (amounts > upper_bound),
+            'is_zscore_anomaly': z_score > z_threshold,
+            'z_score': z_score,
+            'category_mean': mean_amount,
+            'category_std': std_amount
+        }).reset_index(drop=True)
         anomaly_df['is_anomaly'] = anomaly_df['is_iqr_anomaly'] | anomaly_df['is_zscore_anomaly']
         
         print(f"✅ Detected {anomaly_df['is_anomaly'].sum()} anomalous transactions")
@@ -333,11 +387,22 @@ class FinancialDataScience:
         if df.empty:
             return {"error": "No transaction data found for user"}
         
-        # Perform all analyses
-        clustering_results, cluster_analysis = self.spending_pattern_clustering(df)
-        ml_results = self.expense_category_prediction(df)
-        health_scores = self.financial_health_scoring(df)
-        anomalies = self.anomaly_detection(df)
+        # Perform all analyses concurrently; none mutate df and the heavy paths release the GIL
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            clustering_future = executor.submit(self.spending_pattern_clustering, df)
+            ml_future = executor.submit(self.expense_category_prediction, df)
+            health_future = executor.submit(self.financial_health_scoring, df)
+            anomaly_future = executor.submit(self.anomaly_detection, df)
+        
+        clustering_results, cluster_analysis = clustering_future.result()
+        ml_results = ml_future.result()
+        health_scores = health_future.result()
+        anomalies = anomaly_future.result()
+        
+        # Reduce cluster labels and anomaly flags on the raw arrays; bincount's argmax picks the lowest label on ties like mode()
+        cluster_counts = np.bincount(clustering_results['spending_cluster'].to_numpy())
+        anomaly_flags = anomalies['is_anomaly'].to_numpy(dtype=bool)
+        total_anomalies = int(anomaly_flags.sum())
         
         # Compile comprehensive report
         report = {
@@ -355,7 +420,7 @@ class FinancialDataScience:
             },
             "spending_patterns": {
                 "cluster_analysis": cluster_analysis,
-                "dominant_cluster": int(clustering_results['spending_cluster'].mode().iloc[0])
+                "dominant_cluster": int(cluster_counts.argmax())
             },
             "ml_insights": {
                 "category_prediction_accuracy": ml_results['accuracy'],
@@ -369,9 +434,11 @@ class FinancialDataScience:
                 "avg_expense_ratio": float(health_scores['expense_ratio'].mean())
             },
             "anomaly_detection": {
-                "total_anomalies": int(anomalies['is_anomaly'].sum()),
-                "anomaly_rate": float(anomalies['is_anomaly'].mean() * 100),
-                "recent_anomalies": anomalies[anomalies['is_anomaly']].nlargest(5, 'transaction_date')[
+                "total_anomalies": total_anomalies,
+                "anomaly_rate": 100.0 * total_anomalies / anomaly_flags.size if anomaly_flags.size else float('nan'),
+                "recent_anomalies": anomalies[anomalies['is_anomaly']].sort_values(
+                    'transaction_date', ascending=False, kind='stable'
+                ).head(5)[
                     ['transaction_date', 'category', 'amount', 'description']
                 ].to_dict('records')
             }
@@ -0,0 +1,91 @@
+"""
+Streaming ETL load tests against a throwaway SQLite database.
+Run from backend/ with: python -m unittest discover tests
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+import data_pipeline.etl_processor as etl_processor
+from data_pipeline.etl_processor import FinancialDataETL
+from models.database import Base, Transaction, User
+
+
+class StreamingPipelineTest(unittest.TestCase):
+    """Large-file path: batches load in one transaction, empty inputs are handled"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'etl.db')}")
+        Base.metadata.create_all(self.engine)
+        self.db = Session(self.engine)
+        self.db.add(User(id=1, email="stream@example.com", full_name="Stream Test"))
+        self.db.commit()
+        self.etl = FinancialDataETL(self.db, cache_dir=None)
+
+        # Route every file through the streaming path in small record batches
+        for name, value in (('ETL_STREAM_THRESHOLD_BYTES', 0), ('ETL_STREAM_BLOCK_SIZE', 64 * 1024)):
+            patcher = mock.patch.object(etl_processor, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def _write_csv(self, content: bytes) -> str:
+        path = os.path.join(self.tmp_dir.name, 'upload.csv')
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def _transaction_count(self) -> int:
+        return self.db.scalar(select(func.count()).select_from(Transaction))
+
+    def test_failed_later_batch_commits_nothing(self):
+        rows = b''.join(b'2024-01-%02d,walmart purchase %d,-%d.25\n' % (i % 28 + 1, i, i % 500) for i in range(40000))
+        # Invalid UTF-8 past the 1 MiB encoding sniff only surfaces once earlier batches have loaded
+        path = self._write_csv(b'date,description,amount\n' + rows + b'2024-02-01,caf\xe9 \xff,-3.50\n')
+        self.assertGreater(len(rows), 1024 * 1024)
+
+        with mock.patch.object(self.etl, 'load_to_database', wraps=self.etl.load_to_database) as load:
+            result = self.etl.run_full_pipeline(path, 1)
+
+        self.assertEqual(result['status'], 'failed')
+        self.assertGreater(load.call_count, 0)
+        self.assertEqual(self._transaction_count(), 0)
+
+    def test_successful_stream_loads_every_batch(self):
+        rows = b''.join(b'2024-01-%02d,walmart purchase %d,-%d.25\n' % (i % 28 + 1, i, i % 500) for i in range(20000))
+        path = self._write_csv(b'date,description,amount\n' + rows)
+
+        result = self.etl.run_full_pipeline(path, 1)
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['load_stats']['successful_inserts'], 20000)
+        self.assertEqual(self._transaction_count(), 20000)
+
+    def test_header_only_file_loads_nothing(self):
+        result = self.etl.run_full_pipeline(self._write_csv(b'date,description,amount\n'), 1)
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['raw_records'], 0)
+        self.assertEqual(result['load_stats']['successful_inserts'], 0)
+        self.assertEqual(self._transaction_count(), 0)
+
+    def test_empty_file_fails_cleanly(self):
+        result = self.etl.run_full_pipeline(self._write_csv(b''), 1)
+
+        self.assertEqual(result['status'], 'failed')
+        self.assertIn('empty', result['error'])
+        self.assertEqual(self._transaction_count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()